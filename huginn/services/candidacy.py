@@ -2,13 +2,16 @@
 
 import json
 import re
-import time
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
 import psycopg
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 
 from huginn.config import (
     get_pledged_power,
@@ -16,26 +19,77 @@ from huginn.config import (
 )
 from huginn.services.utils import (
     DB_URL,
-    USER_AGENT,
+    QUERY_CONCURRENCY,
     QUERY_DELAY_SECONDS,
+    RateLimiter,
+    SESSION,
     clean_system_name,
     fetch_latest_tick,
     find_reference_systems,
+    parse_html,
 )
 
 INARA_MASSACRE_URL = "https://inara.cz/elite/nearest-misc/"
 EDTOOLS_URL = "https://edtools.cc/pve"
 
+# Only the result-table columns the parsers read (XPath is 1-indexed). The
+# last column doubles as the row-width check: a short row yields fewer cells.
+_MASSACRE_CELLS = etree.XPath("./td[1] | ./td[5] | ./td[6]")  # source, target, width
+_EDTOOLS_CELLS = etree.XPath("./td[10] | ./td[11]")  # target, RES
+_EDSM_LINKS = etree.XPath(".//a[contains(@href, 'edsm.net')]")
+
+# Links to INARA system pages, e.g. /elite/starsystem/1728/
+_STARSYSTEM_LINKS = etree.XPath(".//a[contains(@href, '/starsystem/')]")
+
+# <span class="tag"> elements (CNB / RES markers) in a massacre target cell
+_TAG_SPANS = etree.XPath(".//span[contains(concat(' ', normalize-space(@class), ' '), ' tag ')]")
+
+# EDTools RES cell keywords, e.g. "haz,high,reg,low" ("reg" = regular = medium)
+_EDTOOLS_RES_RE = re.compile(r"(?P<haz>haz)|(?P<high>high)|(?P<reg>reg)|(?P<low>low)")
+
+# RES flags tracked per target system, in CHHML display order
+RES_KEYS = ("has_cnb", "has_haz_res", "has_high_res", "has_med_res", "has_low_res")
+
+# Marks every matched target in one statement. RES flags are OR-merged
+# server-side, so the SQL is the same whatever combination a target reports.
+# Parameters: one array per column, id64 first, then RES_KEYS order.
+_MARK_CANDIDATES_SQL = """
+    UPDATE systems AS s
+    SET is_candidate = TRUE,
+        has_cnb = s.has_cnb OR v.has_cnb,
+        has_haz_res = s.has_haz_res OR v.has_haz_res,
+        has_high_res = s.has_high_res OR v.has_high_res,
+        has_med_res = s.has_med_res OR v.has_med_res,
+        has_low_res = s.has_low_res OR v.has_low_res,
+        updated_at = NOW()
+    FROM unnest(
+        %s::bigint[], %s::boolean[], %s::boolean[],
+        %s::boolean[], %s::boolean[], %s::boolean[]
+    ) AS v(id64, has_cnb, has_haz_res, has_high_res, has_med_res, has_low_res)
+    WHERE s.id64 = v.id64
+"""
+
+# Step 6 sets this per candidate, in pipelined executemany batches
+_SET_SOURCE_FACTIONS_SQL = """
+    UPDATE systems
+    SET metadata = jsonb_set(
+        COALESCE(metadata, '{}'::jsonb),
+        '{source_factions}',
+        %s::jsonb
+    ),
+    updated_at = NOW()
+    WHERE name = %s
+"""
+
 console = Console()
 
 
 def _fetch_inara_massacre(system_name: str) -> str | None:
     """Fetch massacre mission data from INARA for a reference system."""
     try:
-        response = requests.get(
+        response = SESSION.get(
             INARA_MASSACRE_URL,
             params={"ps1": system_name, "pi20": 9},
-            headers={"User-Agent": USER_AGENT},
             timeout=30,
         )
         response.raise_for_status()
@@ -48,10 +102,9 @@ def _fetch_inara_massacre(system_name: str) -> str | None:
 def _fetch_edtools(system_name: str, radius_ly: float) -> str | None:
     """Fetch PVE data from EDTools for a reference system."""
     try:
-        response = requests.get(
+        response = SESSION.get(
             EDTOOLS_URL,
             params={"s": system_name, "md": int(radius_ly), "sc": 2},
-            headers={"User-Agent": USER_AGENT},
             timeout=30,
         )
         response.raise_for_status()
@@ -61,12 +114,37 @@ def _fetch_edtools(system_name: str, radius_ly: float) -> str | None:
         return None
 
 
+def _query_reference(
+    system_name: str,
+    inara_limiter: RateLimiter,
+    edtools_limiter: RateLimiter,
+) -> tuple[dict[str, dict] | None, dict[str, dict] | None]:
+    """Query INARA massacre and EDTools for one reference system.
+
+    Args:
+        system_name: Reference system to search around
+        inara_limiter: Rate limiter shared by all INARA requests
+        edtools_limiter: Rate limiter shared by all EDTools requests
+
+    Returns:
+        Tuple of (inara_targets, edtools_targets); either is None if its fetch failed
+    """
+    inara_limiter.wait()
+    inara_html = _fetch_inara_massacre(system_name)
+    inara_targets = _parse_inara_massacre_results(inara_html) if inara_html else None
+
+    edtools_limiter.wait()
+    edtools_html = _fetch_edtools(system_name, CANDIDACY_QUERY_RADIUS_LY)
+    edtools_targets = _parse_edtools_results(edtools_html) if edtools_html else None
+
+    return inara_targets, edtools_targets
+
+
 def _fetch_inara_system(url: str) -> str | None:
     """Fetch INARA system detail page."""
     try:
-        response = requests.get(
+        response = SESSION.get(
             url,
-            headers={"User-Agent": USER_AGENT},
             timeout=30,
         )
         response.raise_for_status()
@@ -83,7 +161,7 @@ def _parse_inara_system_factions(html: str) -> dict:
         - factions: list of {name, state} dicts
         - factions_updated_at: datetime or None
     """
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "lxml")
 
     result = {
         "factions": [],
@@ -175,56 +253,69 @@ def _parse_inara_massacre_results(html: str) -> dict[str, dict]:
         "sources": {source_name: source_url, ...}
     }}.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table", class_="tablesortercollapsed")
-    if not table:
+    doc = parse_html(html)
+    if doc is None:
+        return {}
+
+    tables = doc.xpath(
+        "//table[contains(concat(' ', normalize-space(@class), ' '), ' tablesortercollapsed ')]"
+    )
+    if not tables:
         return {}
 
     target_systems: dict[str, dict] = {}
-    tbody = table.find("tbody")
-    if not tbody:
+    tbody = tables[0].find(".//tbody")
+    if tbody is None:
         return {}
 
-    rows = tbody.find_all("tr")
-    for row in rows:
-        cells = row.find_all("td")
-        if len(cells) < 6:
+    for row in tbody.iter("tr"):
+        cells = _MASSACRE_CELLS(row)
+        if len(cells) < 3:
+            continue
+        source_cell, system_cell = cells[0], cells[1]
+
+        # Cell 4: TARGET system - resolved first so duplicate rows skip source parsing
+        system_links = _STARSYSTEM_LINKS(system_cell)
+        if not system_links:
+            continue
+        system_name = clean_system_name(system_links[0].text_content().strip())
+        if not system_name or system_name in target_systems:
             continue
 
         # Cell 0: SOURCE STAR SYSTEM - contains links to source systems
-        source_cell = cells[0]
-        source_links = source_cell.find_all("a", href=lambda h: h and "/starsystem/" in h)
+        source_links = _STARSYSTEM_LINKS(source_cell)
         sources = {}
         for link in source_links:
-            src_name = clean_system_name(link.get_text(strip=True))
+            src_name = clean_system_name(link.text_content().strip())
             src_href = link.get("href", "")
             if src_name and src_href:
                 # Build full URL from relative href like /elite/starsystem/1728/
-                sources[src_name] = f"https://inara.cz{src_href}"
-
-        # Cell 4: TARGET system
-        system_cell = cells[4]
-        system_link = system_cell.find("a", href=lambda h: h and "/starsystem/" in h)
-        if system_link:
-            system_name = clean_system_name(system_link.get_text(strip=True))
-            if not system_name or system_name in target_systems:
-                continue
-
-            tags = system_cell.find_all("span", class_="tag")
-            tag_texts = [tag.get_text(strip=True).lower() for tag in tags]
-
-            has_cnb = any("cnb" in t for t in tag_texts)
-            has_haz_res = any("haz res" in t for t in tag_texts)
-            has_high_res = any("high res" in t for t in tag_texts)
-            has_low_res = any("low res" in t for t in tag_texts)
+                # Interned: the same sources recur across rows and reference
+                # systems, and the URL is the Step 6 source_cache key.
+                sources[src_name] = sys.intern(f"https://inara.cz{src_href}")
+
+        # Most target cells carry no tags at all: probe for any <span> with a
+        # lazy C-level iterator before running the class-matching XPath.
+        # Tags may carry extra words, so match substrings - but against one
+        # joined string rather than a generator pass per RES type. The
+        # separator keeps a match from spanning two tags.
+        if next(system_cell.iter("span"), None) is None:
+            tag_text = ""
+        else:
+            tag_text = "|".join(tag.text_content() for tag in _TAG_SPANS(system_cell)).lower()
+
+        has_cnb = "cnb" in tag_text
+        has_haz_res = "haz res" in tag_text
+        has_high_res = "high res" in tag_text
+        has_low_res = "low res" in tag_text
 
-            target_systems[system_name] = {
-                "has_cnb": has_cnb,
-                "has_haz_res": has_haz_res,
-                "has_high_res": has_high_res,
-                "has_low_res": has_low_res,
-                "sources": sources,
-            }
+        target_systems[system_name] = {
+            "has_cnb": has_cnb,
+            "has_haz_res": has_haz_res,
+            "has_high_res": has_high_res,
+            "has_low_res": has_low_res,
+            "sources": sources,
+        }
 
     return target_systems
 
@@ -235,49 +326,66 @@ def _parse_edtools_results(html: str) -> dict[str, dict]:
     Returns dict of {system_name: {"has_high_res": bool, "has_med_res": bool, "has_low_res": bool, "has_haz_res": bool}}.
     RES info is in column 11 (index 10), format: "haz,high,reg,low" or "high,low" or "2 rings" or "no rings".
     """
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table", id="sys_tbl")
-    if not table:
+    doc = parse_html(html)
+    if doc is None:
+        return {}
+
+    tables = doc.xpath("//table[@id='sys_tbl']")
+    if not tables:
         return {}
 
     target_systems: dict[str, dict] = {}
-    rows = table.find_all("tr")
+    rows = list(tables[0].iter("tr"))
 
     for row in rows[1:]:
-        cells = row.find_all("td")
-        if len(cells) < 11:
+        cells = _EDTOOLS_CELLS(row)
+        if len(cells) < 2:
             continue
+        target_cell, res_cell = cells
 
         # Target system is in column 10 (index 9)
-        target_cell = cells[9]
-        edsm_link = target_cell.find("a", href=lambda h: h and "edsm.net" in h)
-        if not edsm_link:
+        edsm_links = _EDSM_LINKS(target_cell)
+        if not edsm_links:
             continue
 
-        system_name = edsm_link.get_text(strip=True)
+        system_name = edsm_links[0].text_content().strip()
         if not system_name or system_name in target_systems:
             continue
 
         # RES info is in column 11 (index 10)
         # Format: <a href="res?s=...">haz,high,reg,low</a> or just "2 rings" / "no rings"
-        res_cell = cells[10]
-        res_text = res_cell.get_text(strip=True).lower()
-
-        has_high_res = "high" in res_text
-        has_med_res = "reg" in res_text  # "reg" = regular = medium
-        has_low_res = "low" in res_text
-        has_haz_res = "haz" in res_text
+        res_text = res_cell.text_content().strip().lower()
+        res_types = {m.lastgroup for m in _EDTOOLS_RES_RE.finditer(res_text)}
 
         target_systems[system_name] = {
-            "has_high_res": has_high_res,
-            "has_med_res": has_med_res,
-            "has_low_res": has_low_res,
-            "has_haz_res": has_haz_res,
+            "has_high_res": "high" in res_types,
+            "has_med_res": "reg" in res_types,
+            "has_low_res": "low" in res_types,
+            "has_haz_res": "haz" in res_types,
         }
 
     return target_systems
 
 
+def _merge_pools(inara_pool: dict[str, dict], edtools_pool: dict[str, dict]) -> dict[str, dict]:
+    """Merge INARA and EDTools target pools into one pool keyed by system name.
+
+    RES flags are OR-merged across both pools. Sources only come from INARA,
+    EDTools doesn't report source systems.
+    """
+    empty: dict = {}
+
+    def merge(inara: dict, edtools: dict) -> dict:
+        entry = {key: bool(inara.get(key) or edtools.get(key)) for key in RES_KEYS}
+        entry["sources"] = inara.get("sources", {})
+        return entry
+
+    return {
+        name: merge(inara_pool.get(name, empty), edtools_pool.get(name, empty))
+        for name in inara_pool.keys() | edtools_pool.keys()
+    }
+
+
 def _save_faction_info(conn, system_name: str, faction_info: dict) -> None:
     """Save faction info to a system's metadata and update inara_factions_updated_at.
 
@@ -303,6 +411,25 @@ def _save_faction_info(conn, system_name: str, faction_info: dict) -> None:
             WHERE name = %s
             """,
             (json.dumps(factions), factions_updated_at, system_name),
+            prepare=True,
+        )
+    conn.commit()
+
+
+def _save_source_factions(conn, updates: list[tuple[str, str]]) -> None:
+    """Save candidates' source faction strings to their metadata.
+
+    psycopg's executemany pipelines the statements, so the whole batch
+    costs one round trip rather than one per candidate.
+
+    Args:
+        conn: Database connection
+        updates: List of (candidate name, faction string) tuples
+    """
+    with conn.cursor() as cur:
+        cur.executemany(
+            _SET_SOURCE_FACTIONS_SQL,
+            [(json.dumps(faction_str), cand_name) for cand_name, faction_str in updates],
         )
     conn.commit()
 
@@ -318,7 +445,6 @@ def _reset_non_contest_candidates(conn) -> int:
             SET is_candidate = FALSE, updated_at = NOW()
             WHERE power_state != 'Contested'
               AND is_candidate = TRUE
-            RETURNING id64
         """)
         return cur.rowcount
 
@@ -335,41 +461,33 @@ def _mark_candidates_with_res(conn, target_systems: dict[str, dict]) -> int:
     if not target_systems:
         return 0
 
-    marked = 0
     with conn.cursor() as cur:
-        for name, res_info in target_systems.items():
-            set_parts = ["is_candidate = TRUE", "updated_at = NOW()"]
-
-            # Only turn false to true, not the opposite. Resource info is loose—
-            # we query multiple sources and store "true" if any source reports it.
-            if res_info.get("has_cnb"):
-                set_parts.append("has_cnb = TRUE")
-            if res_info.get("has_haz_res"):
-                set_parts.append("has_haz_res = TRUE")
-            if res_info.get("has_high_res"):
-                set_parts.append("has_high_res = TRUE")
-            if res_info.get("has_med_res"):
-                set_parts.append("has_med_res = TRUE")
-            if res_info.get("has_low_res"):
-                set_parts.append("has_low_res = TRUE")
-
-            cur.execute(
-                f"""
-                UPDATE systems
-                SET {", ".join(set_parts)}
-                WHERE name = %s
-                  AND power_state = 'Expansion'
-                  AND has_ring = TRUE
-                RETURNING id64, is_candidate
-                """,
-                (name,),
-            )
-            row = cur.fetchone()
-            if row:
-                # Count as marked if it wasn't already a candidate
-                marked += 1
-
-    return marked
+        # Load the eligible systems once rather than looking up each target by name
+        cur.execute("""
+            SELECT name, id64 FROM systems
+            WHERE power_state = 'Expansion' AND has_ring = TRUE
+        """)
+        ids_by_name: dict[str, list[int]] = {}
+        for name, id64 in cur.fetchall():
+            ids_by_name.setdefault(name, []).append(id64)
+
+        matched = ids_by_name.keys() & target_systems.keys()
+        if not matched:
+            return 0
+
+        # Only turn false to true, not the opposite. Resource info is loose—
+        # we query multiple sources and store "true" if any source reports it.
+        rows = [
+            (id64, *(bool(target_systems[name].get(key)) for key in RES_KEYS))
+            for name in matched
+            for id64 in ids_by_name[name]
+        ]
+        columns = [list(column) for column in zip(*rows)]
+
+        # Single statement for all matches: one array parameter per column
+        cur.execute(_MARK_CANDIDATES_SQL, columns)
+
+    return len(matched)
 
 
 def update_candidacy() -> bool:
@@ -403,21 +521,17 @@ def update_candidacy() -> bool:
 
             # Step 2: Calculate reference systems
             console.print("[cyan]Step 2:[/cyan] Calculating reference systems...")
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT COUNT(*) FROM systems
-                    WHERE power_state = 'Expansion' AND has_ring = TRUE
-                """)
-                total_targets = cur.fetchone()[0]
+            reference_systems = find_reference_systems(conn, CANDIDACY_QUERY_RADIUS_LY)
 
+            # The cover assigns every Expansion system with rings to exactly
+            # one reference system, so no separate COUNT(*) is needed
+            total_targets = sum(ref["covers"] for ref in reference_systems)
             if total_targets == 0:
                 console.print("[yellow]No Expansion systems with rings found.[/yellow]")
                 console.print("[dim]Run 'Update INARA data' first.[/dim]")
                 return False
 
             console.print(f"  [dim]Found {total_targets} Expansion systems with rings[/dim]")
-
-            reference_systems = find_reference_systems(conn, CANDIDACY_QUERY_RADIUS_LY)
             console.print(f"  [green]Need {len(reference_systems)} queries[/green]")
             console.print()
 
@@ -426,43 +540,68 @@ def update_candidacy() -> bool:
             inara_pool: dict[str, dict] = {}
             edtools_pool: dict[str, dict] = {}
 
-            for i, ref in enumerate(reference_systems):
-                if i > 0:
-                    console.print(f"[dim]Waiting {QUERY_DELAY_SECONDS}s...[/dim]")
-                    time.sleep(QUERY_DELAY_SECONDS)
-
-                console.print(
-                    f"  [cyan]({i+1}/{len(reference_systems)})[/cyan] "
-                    f"Querying {ref['name']}..."
-                )
-
-                # Query INARA
-                inara_html = _fetch_inara_massacre(ref["name"])
-                if inara_html:
-                    inara_targets = _parse_inara_massacre_results(inara_html)
-                    for name, res_info in inara_targets.items():
-                        if name not in inara_pool:
-                            inara_pool[name] = res_info
-                    console.print(f"    [dim]INARA: {len(inara_targets)} targets[/dim]")
-                else:
-                    console.print(f"    [dim]INARA: failed[/dim]")
-
-                # Query EDTools
-                edtools_html = _fetch_edtools(ref["name"], CANDIDACY_QUERY_RADIUS_LY)
-                if edtools_html:
-                    edtools_targets = _parse_edtools_results(edtools_html)
-                    for name, res_info in edtools_targets.items():
-                        if name not in edtools_pool:
-                            edtools_pool[name] = res_info
-                    console.print(f"    [dim]EDTools: {len(edtools_targets)} targets[/dim]")
-                else:
-                    console.print(f"    [dim]EDTools: failed[/dim]")
+            failed: list[str] = []
+
+            # Up to QUERY_CONCURRENCY reference systems are in flight; each host
+            # still gets at most one request start per QUERY_DELAY_SECONDS
+            inara_limiter = RateLimiter()
+            edtools_limiter = RateLimiter()
+
+            # One progress bar for the whole loop; failures are reported after it
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TaskProgressColumn(),
+                console=console,
+            ) as progress:
+                task = progress.add_task("Querying...", total=len(reference_systems))
 
+                results: list[tuple | None] = [None] * len(reference_systems)
+
+                executor = ThreadPoolExecutor(max_workers=QUERY_CONCURRENCY)
+                try:
+                    futures = {
+                        executor.submit(
+                            _query_reference, ref["name"], inara_limiter, edtools_limiter
+                        ): i
+                        for i, ref in enumerate(reference_systems)
+                    }
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        results[i] = future.result()
+                        progress.update(
+                            task, advance=1,
+                            description=f"Queried {reference_systems[i]['name']}...",
+                        )
+                finally:
+                    # Don't sit through queued queries after an error or Ctrl-C
+                    executor.shutdown(cancel_futures=True)
+
+            # The first reference system to report a target wins. Updating in
+            # reverse reference order gets that with C-level dict.update calls,
+            # regardless of which response arrived first.
+            for ref, (inara_targets, edtools_targets) in zip(reference_systems, results):
+                if inara_targets is None:
+                    failed.append(f"INARA: {ref['name']}")
+                if edtools_targets is None:
+                    failed.append(f"EDTools: {ref['name']}")
+
+            for inara_targets, edtools_targets in reversed(results):
+                if inara_targets:
+                    inara_pool.update(inara_targets)
+                if edtools_targets:
+                    edtools_pool.update(edtools_targets)
+
+            if failed:
+                console.print(f"  [yellow]{len(failed)} queries failed:[/yellow]")
+                for entry in failed:
+                    console.print(f"    [dim]{entry}[/dim]")
             console.print()
 
             # Step 4: Compare pools
             console.print("[cyan]Step 4:[/cyan] Comparing INARA and EDTools pools...")
-            edtools_only = set(edtools_pool.keys()) - set(inara_pool.keys())
+            edtools_only = edtools_pool.keys() - inara_pool.keys()
             console.print(f"  Total INARA targets: {len(inara_pool)}")
             console.print(f"  Total EDTools targets: {len(edtools_pool)}")
             console.print(f"  [yellow]EDTools only (not in INARA): {len(edtools_only)}[/yellow]")
@@ -476,33 +615,7 @@ def update_candidacy() -> bool:
 
             # Merge pools - EDTools now has RES info too
             # Keep sources from INARA pool for faction counting
-            combined_pool: dict[str, dict] = {}
-            for name, res_info in inara_pool.items():
-                combined_pool[name] = {
-                    "has_cnb": res_info.get("has_cnb", False),
-                    "has_haz_res": res_info.get("has_haz_res", False),
-                    "has_high_res": res_info.get("has_high_res", False),
-                    "has_med_res": False,  # INARA doesn't have med
-                    "has_low_res": res_info.get("has_low_res", False),
-                    "sources": res_info.get("sources", {}),
-                }
-            for name, res_info in edtools_pool.items():
-                if name in combined_pool:
-                    combined_pool[name]["has_cnb"] |= res_info.get("has_cnb", False)
-                    combined_pool[name]["has_haz_res"] |= res_info.get("has_haz_res", False)
-                    combined_pool[name]["has_high_res"] |= res_info.get("has_high_res", False)
-                    combined_pool[name]["has_med_res"] |= res_info.get("has_med_res", False)
-                    combined_pool[name]["has_low_res"] |= res_info.get("has_low_res", False)
-                else:
-                    # EDTools doesn't have source info
-                    combined_pool[name] = {
-                        "has_cnb": res_info.get("has_cnb", False),
-                        "has_haz_res": res_info.get("has_haz_res", False),
-                        "has_high_res": res_info.get("has_high_res", False),
-                        "has_med_res": res_info.get("has_med_res", False),
-                        "has_low_res": res_info.get("has_low_res", False),
-                        "sources": {},
-                    }
+            combined_pool = _merge_pools(inara_pool, edtools_pool)
 
             marked = _mark_candidates_with_res(conn, combined_pool)
             conn.commit()
@@ -540,6 +653,10 @@ def update_candidacy() -> bool:
                 # Cache: URL -> faction info (avoid refetching same source)
                 source_cache: dict[str, dict] = {}
 
+                # Metadata updates are held until the next fetch (or the end),
+                # so candidates answered from cache are written together
+                pending_metadata: list[tuple[str, str]] = []
+
                 for cand_name, sources in candidates_with_sources:
                     faction_counts = []
 
@@ -557,6 +674,7 @@ def update_candidacy() -> bool:
                                         FROM systems WHERE name = %s
                                         """,
                                         (src_name,),
+                                        prepare=True,
                                     )
                                     row = cur.fetchone()
                                     if row and row[1]:
@@ -572,8 +690,15 @@ def update_candidacy() -> bool:
                                             console.print(f"    [dim]{src_name} (cached)[/dim]")
 
                             if faction_info is None:
+                                # Save what we have before waiting on the network
+                                if pending_metadata:
+                                    _save_source_factions(conn, pending_metadata)
+                                    pending_metadata = []
+
                                 console.print(f"    [dim]Fetching {src_name}...[/dim]")
-                                time.sleep(QUERY_DELAY_SECONDS)
+                                # Only waits out what remains of the delay since the
+                                # last INARA request; parsing and saving count towards it
+                                inara_limiter.wait()
                                 html = _fetch_inara_system(src_url)
                                 if html:
                                     faction_info = _parse_inara_system_factions(html)
@@ -591,24 +716,12 @@ def update_candidacy() -> bool:
                         total = sum(faction_counts)
                         faction_str = "+".join(str(c) for c in faction_counts) + f"={total}"
 
-                        # Update metadata
-                        with conn.cursor() as cur:
-                            cur.execute(
-                                """
-                                UPDATE systems
-                                SET metadata = jsonb_set(
-                                    COALESCE(metadata, '{}'::jsonb),
-                                    '{source_factions}',
-                                    %s::jsonb
-                                ),
-                                updated_at = NOW()
-                                WHERE name = %s
-                                """,
-                                (f'"{faction_str}"', cand_name),
-                            )
-                        conn.commit()
+                        pending_metadata.append((cand_name, faction_str))
                         console.print(f"  {cand_name}: {faction_str}")
 
+                if pending_metadata:
+                    _save_source_factions(conn, pending_metadata)
+
                 console.print(f"  [dim]Cached {len(source_cache)} source systems[/dim]")
 
             console.print()
@@ -1,15 +1,32 @@
 """INARA power history scraper - detects systems that changed state."""
 
 import re
-from datetime import datetime, timezone
+from datetime import datetime, timedelta
 
 import psycopg
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
 from rich.console import Console
 
 from huginn.config import get_pledged_power, get_power_url
-from huginn.services.utils import DB_URL, USER_AGENT, clean_system_name
+from huginn.services.utils import (
+    DB_URL,
+    EPOCH,
+    SESSION,
+    clean_system_name,
+    load_inara_timestamps,
+    parse_html,
+)
+
+# State transition separators, tried in order. The separator is a special
+# arrow character (U+E833 or similar), with a plain ">" as fallback.
+_STATE_PATTERNS = (
+    re.compile(r"(.+?)\s*[︎>→]\s*(.+)"),  # Arrow characters
+    re.compile(r"(.+?)\s+>\s+(.+)"),  # Simple >
+)
+
+# Name, state transition and updated cells of a history row (XPath is 1-indexed)
+_HISTORY_CELLS = etree.XPath("./td[1] | ./td[3] | ./td[4]")
 
 console = Console()
 
@@ -17,11 +34,7 @@ console = Console()
 def _fetch_page(url: str) -> str | None:
     """Fetch a page from INARA."""
     try:
-        response = requests.get(
-            url,
-            headers={"User-Agent": USER_AGENT},
-            timeout=30,
-        )
+        response = SESSION.get(url, timeout=30)
         response.raise_for_status()
         return response.text
     except requests.RequestException as e:
@@ -34,15 +47,9 @@ def _parse_state_transition(state_text: str) -> tuple[str, str] | None:
 
     Returns tuple of (before_state, after_state) or None if parsing fails.
     """
-    # The separator is a special arrow character (U+E833 or similar)
-    # Try multiple patterns
-    patterns = [
-        r"(.+?)\s*[︎>→]\s*(.+)",  # Arrow characters
-        r"(.+?)\s+>\s+(.+)",  # Simple >
-    ]
-
-    for pattern in patterns:
-        match = re.match(pattern, state_text.strip())
+    text = state_text.strip()
+    for pattern in _STATE_PATTERNS:
+        match = pattern.match(text)
         if match:
             before = match.group(1).strip()
             after = match.group(2).strip()
@@ -56,45 +63,47 @@ def _parse_history_page(html: str) -> list[dict]:
 
     Returns list of dicts with: name, before_state, after_state, updated_at
     """
-    soup = BeautifulSoup(html, "html.parser")
+    doc = parse_html(html)
+    if doc is None:
+        return []
 
     # Find the table with class tablesorter
-    table = soup.find("table", class_="tablesorter")
-    if not table:
+    tables = doc.xpath("//table[contains(concat(' ', normalize-space(@class), ' '), ' tablesorter ')]")
+    if not tables:
         return []
 
-    tbody = table.find("tbody")
-    if not tbody:
+    tbody = tables[0].find(".//tbody")
+    if tbody is None:
         return []
 
     transitions = []
-    rows = tbody.find_all("tr")
 
-    for row in rows:
-        cells = row.find_all("td")
-        if len(cells) < 4:
+    for row in tbody.iter("tr"):
+        cells = _HISTORY_CELLS(row)
+        if len(cells) < 3:
             continue
+        name_cell, state_cell, updated_cell = cells
 
         # Cell 0: System name (link)
-        name_link = cells[0].find("a")
-        if not name_link:
+        name_link = name_cell.find(".//a")
+        if name_link is None:
             continue
-        name = clean_system_name(name_link.get_text(strip=True))
+        name = clean_system_name(name_link.text_content().strip())
 
         # Cell 2: State transition (e.g., "Expansion > Exploited")
-        state_text = cells[2].get_text(strip=True)
+        state_text = state_cell.text_content().strip()
         transition = _parse_state_transition(state_text)
         if not transition:
             continue
         before_state, after_state = transition
 
         # Cell 3: Updated timestamp (data-order attribute)
-        updated_ts = cells[3].get("data-order")
+        updated_ts = updated_cell.get("data-order")
         if not updated_ts:
             continue
 
         try:
-            updated_at = datetime.fromtimestamp(int(updated_ts), tz=timezone.utc)
+            updated_at = EPOCH + timedelta(seconds=int(updated_ts))
         except (ValueError, TypeError):
             continue
 
@@ -143,46 +152,62 @@ def update_from_history() -> bool:
             skipped = 0
             not_found_names = []
 
-            for t in transitions:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "SELECT id64, inara_info_updated_at FROM systems WHERE name = %s",
-                        (t["name"],),
-                    )
-                    row = cur.fetchone()
+            lookup = load_inara_timestamps(conn, [t["name"] for t in transitions])
 
-                if not row:
+            # Walk transitions in page order so repeated systems resolve
+            # exactly as applying them one by one would; only the final
+            # state of each row needs writing
+            pending: dict[int, tuple[str, datetime]] = {}
+            for t in transitions:
+                rows = lookup.get(t["name"])
+                if rows is None:
                     not_found_names.append(t["name"])
                     continue
 
-                db_id64, db_updated = row
+                # Only update if this transition is newer
+                stale = [row for row in rows if row[1] is None or row[1] < t["updated_at"]]
+                if not stale:
+                    skipped += 1
+                    continue
 
-                # Check if INARA data is newer
-                if db_updated is not None:
-                    if db_updated.tzinfo is None:
-                        db_updated = db_updated.replace(tzinfo=timezone.utc)
-                    if t["updated_at"] <= db_updated:
-                        skipped += 1
-                        continue
+                for row in stale:
+                    pending[row[0]] = (t["after_state"], t["updated_at"])
+                    row[1] = t["updated_at"]
+                console.print(
+                    f"  {t['name']}: {t['before_state']} → {t['after_state']}"
+                )
+                updated += 1
 
+            if pending:
                 with conn.cursor() as cur:
+                    # Stream the changes into a temp table with COPY, then
+                    # apply them all with one joined UPDATE
+                    cur.execute("""
+                        CREATE TEMP TABLE history_updates (
+                            id64 BIGINT PRIMARY KEY,
+                            power_state TEXT,
+                            inara_info_updated_at TIMESTAMPTZ
+                        ) ON COMMIT DROP
+                    """)
+                    with cur.copy(
+                        "COPY history_updates (id64, power_state, inara_info_updated_at) FROM STDIN"
+                    ) as copy:
+                        for id64, (power_state, updated_at) in pending.items():
+                            copy.write_row((id64, power_state, updated_at))
+
                     cur.execute(
                         """
-                        UPDATE systems
+                        UPDATE systems AS s
                         SET power = %s,
-                            power_state = %s,
-                            inara_info_updated_at = %s,
+                            power_state = h.power_state,
+                            inara_info_updated_at = h.inara_info_updated_at,
                             updated_at = NOW()
-                        WHERE id64 = %s
+                        FROM history_updates AS h
+                        WHERE s.id64 = h.id64
                         """,
-                        (power, t["after_state"], t["updated_at"], db_id64),
+                        (power,),
                     )
 
-                console.print(
-                    f"  {t['name']}: {t['before_state']} → {t['after_state']}"
-                )
-                updated += 1
-
             conn.commit()
 
             console.print()
@@ -1,16 +1,25 @@
 """INARA scraper service - fetches powerplay data."""
 
-from datetime import datetime, timezone
+from datetime import timedelta
 
 import psycopg
 import requests
-from bs4 import BeautifulSoup
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 
 from huginn.config import get_pledged_power, get_power_url
 
-from huginn.services.utils import DB_URL, USER_AGENT, clean_system_name
+from huginn.services.utils import (
+    DB_URL,
+    EPOCH,
+    SESSION,
+    clean_system_name,
+    load_inara_timestamps,
+    parse_html,
+)
+
+# Systems written per executemany; the progress bar advances after each batch
+UPDATE_BATCH_SIZE = 100
 
 console = Console()
 
@@ -18,11 +27,7 @@ console = Console()
 def _fetch_page(url: str) -> str | None:
     """Fetch a page from INARA."""
     try:
-        response = requests.get(
-            url,
-            headers={"User-Agent": USER_AGENT},
-            timeout=30,
-        )
+        response = SESSION.get(url, timeout=30)
         response.raise_for_status()
         return response.text
     except requests.RequestException as e:
@@ -35,30 +40,34 @@ def _parse_systems_page(html: str) -> list[dict]:
 
     Returns list of dicts with: name, state, inara_info_updated_at (as datetime)
     """
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table")
-    if not table:
+    doc = parse_html(html)
+    if doc is None:
+        return []
+
+    tables = doc.xpath("//table")
+    if not tables:
         return []
+    table = tables[0]
 
     # Find which column has "Updated" header
-    headers = table.find_all("th")
+    headers = table.iter("th")
     updated_col = -1  # Default to last column
     for i, th in enumerate(headers):
-        if "Updated" in th.get_text():
+        if "Updated" in th.text_content():
             updated_col = i
             break
 
     systems = []
-    rows = table.find_all("tr")
+    rows = list(table.iter("tr"))
 
     # Skip header row
     for row in rows[1:]:
-        cells = row.find_all("td")
+        cells = row.findall("td")
         if len(cells) < 3:  # Need at least name, state, updated
             continue
 
-        name = clean_system_name(cells[0].get_text(strip=True))
-        state = cells[1].get_text(strip=True)
+        name = clean_system_name(cells[0].text_content().strip())
+        state = cells[1].text_content().strip()
 
         # Get updated timestamp from the correct column
         updated_cell = cells[updated_col] if updated_col >= 0 else cells[-1]
@@ -68,9 +77,7 @@ def _parse_systems_page(html: str) -> list[dict]:
             continue
 
         try:
-            inara_info_updated_at = datetime.fromtimestamp(
-                int(updated_ts), tz=timezone.utc
-            )
+            inara_info_updated_at = EPOCH + timedelta(seconds=int(updated_ts))
         except (ValueError, TypeError):
             continue
 
@@ -109,6 +116,11 @@ def _update_systems(
     skipped = 0
     not_found_names = []
 
+    lookup = load_inara_timestamps(conn, [system["name"] for system in systems])
+
+    # Update params per system to write; the writes go out in batches
+    updates = []
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -119,54 +131,52 @@ def _update_systems(
         task = progress.add_task(label, total=len(systems))
 
         for system in systems:
-            # Find system in DB by name
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id64, inara_info_updated_at FROM systems WHERE name = %s",
-                    (system["name"],),
-                )
-                row = cur.fetchone()
-
-            if not row:
+            rows = lookup.get(system["name"])
+            if rows is None:
                 not_found_names.append(system["name"])
                 progress.update(task, advance=1)
                 continue
 
-            db_id64, db_inara_updated = row
-
-            # Check if INARA data is newer
-            if db_inara_updated is not None:
-                # Make db timestamp timezone-aware for comparison
-                if db_inara_updated.tzinfo is None:
-                    db_inara_updated = db_inara_updated.replace(tzinfo=timezone.utc)
-                if system["inara_info_updated_at"] <= db_inara_updated:
-                    skipped += 1
-                    progress.update(task, advance=1)
-                    continue
+            # Only update if INARA data is newer
+            new_ts = system["inara_info_updated_at"]
+            stale = [row for row in rows if row[1] is None or row[1] < new_ts]
+            if not stale:
+                skipped += 1
+                progress.update(task, advance=1)
+                continue
 
-            # Determine is_candidate value
+            # Determine is_candidate value (None leaves it unchanged)
             if candidate_rule == "always_false":
-                is_candidate_sql = ", is_candidate = FALSE"
+                is_candidate = False
             elif candidate_rule == "true_if_contested" and system["state"] == "Contested":
-                is_candidate_sql = ", is_candidate = TRUE"
+                is_candidate = True
             else:
-                is_candidate_sql = ""
+                is_candidate = None
 
-            # Update the system
-            with conn.cursor() as cur:
-                cur.execute(
-                    f"""
+            params = []
+            for row in stale:
+                params.append((power, system["state"], new_ts, is_candidate, row[0]))
+                row[1] = new_ts
+            updates.append(params)
+            updated += 1
+
+        # Updated systems count towards the bar once their batch is written
+        with conn.cursor() as cur:
+            for start in range(0, len(updates), UPDATE_BATCH_SIZE):
+                batch = updates[start:start + UPDATE_BATCH_SIZE]
+                cur.executemany(
+                    """
                     UPDATE systems
                     SET power = %s,
                         power_state = %s,
-                        inara_info_updated_at = %s{is_candidate_sql},
+                        inara_info_updated_at = %s,
+                        is_candidate = COALESCE(%s, is_candidate),
                         updated_at = NOW()
                     WHERE id64 = %s
                     """,
-                    (power, system["state"], system["inara_info_updated_at"], db_id64),
+                    [row for params in batch for row in params],
                 )
-            updated += 1
-            progress.update(task, advance=1)
+                progress.update(task, advance=len(batch))
 
     return updated, skipped, not_found_names
 
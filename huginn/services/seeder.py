@@ -1,19 +1,36 @@
 """Database seeding service - imports Spansh galaxy data."""
 
 import gzip
+import os
+import queue
+import threading
+from fnmatch import fnmatch
 from pathlib import Path
 
 import ijson
 import psycopg
+from psycopg import sql
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 
 from huginn.services.utils import DB_URL, get_system_count, is_db_seeded
 
+try:
+    # ISA-L's igzip is a drop-in gzip module with several times faster inflate
+    from isal import igzip
+except ImportError:
+    igzip = gzip
+
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 
-# Batch size for inserts
-BATCH_SIZE = 1000
+# Rows staged with COPY per merge into systems
+BATCH_SIZE = 10000
+
+# Rows merged per transaction
+COMMIT_ROWS = 50000
+
+# Parsed batches allowed to wait for the database writer
+BATCH_QUEUE_SIZE = 4
 
 # Expected system count (for progress bar)
 EXPECTED_SYSTEMS = 110000
@@ -23,11 +40,18 @@ console = Console()
 
 def _find_dump_file() -> Path | None:
     """Find the latest galaxy_*.json.gz file in the data directory."""
-    matches = list(DATA_DIR.glob("galaxy_*.json.gz"))
+    try:
+        with os.scandir(DATA_DIR) as entries:
+            matches = [
+                entry for entry in entries
+                if fnmatch(entry.name, "galaxy_*.json.gz") and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return None
     if not matches:
         return None
     # Return the most recently modified file
-    return max(matches, key=lambda p: p.stat().st_mtime)
+    return Path(max(matches, key=lambda entry: entry.stat().st_mtime).path)
 
 
 def _has_rings(system: dict) -> bool:
@@ -39,27 +63,162 @@ def _has_rings(system: dict) -> bool:
 
 
 def _stream_systems(filepath: Path):
-    """Stream parse systems from gzip file, yielding one at a time."""
-    with gzip.open(filepath, "rb") as f:
-        for system in ijson.items(f, "item"):
+    """Stream parse systems from gzip file, yielding one at a time.
+
+    Yields:
+        (id64, name, x, y, z, has_ring) tuples, in systems_stage column order
+    """
+    # ijson picks its fastest available backend (the C yajl2_c extension);
+    # use_float returns coordinates as floats instead of Decimal objects
+    with igzip.open(filepath, "rb") as f:
+        for system in ijson.items(f, "item", use_float=True):
             coords = system.get("coords", {})
-            yield {
-                "id64": system["id64"],
-                "name": system["name"],
-                "x": coords.get("x", 0),
-                "y": coords.get("y", 0),
-                "z": coords.get("z", 0),
-                "has_ring": _has_rings(system),
-            }
-
-
-def _insert_batch(conn, batch: list[dict]) -> None:
-    """Insert a batch of systems into the database."""
+            yield (
+                system["id64"],
+                system["name"],
+                coords.get("x", 0),
+                coords.get("y", 0),
+                coords.get("z", 0),
+                _has_rings(system),
+            )
+
+
+def _put(batches: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put an item on the batch queue, giving up once the consumer has stopped.
+
+    Returns:
+        True if the item was queued.
+    """
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce_batches(filepath: Path, batches: queue.Queue, stop: threading.Event) -> None:
+    """Parse the dump into BATCH_SIZE row lists on a background thread.
+
+    Queues each batch, then None at the end of the stream. A parse error is
+    queued in place of the None so the consumer can re-raise it.
+    """
+    try:
+        batch = []
+        for row in _stream_systems(filepath):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                if not _put(batches, batch, stop):
+                    return
+                batch = []
+        if batch and not _put(batches, batch, stop):
+            return
+        end = None
+    except Exception as e:
+        end = e
+    _put(batches, end, stop)
+
+
+def _create_stage_table(conn) -> None:
+    """Create the session-local staging table that batches are copied into."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS systems_stage (
+                id64 BIGINT,
+                name TEXT,
+                x DOUBLE PRECISION,
+                y DOUBLE PRECISION,
+                z DOUBLE PRECISION,
+                has_ring BOOLEAN,
+                seq BIGINT GENERATED ALWAYS AS IDENTITY
+            )
+        """)
+    conn.commit()
+
+
+def _drop_secondary_indexes(conn) -> int:
+    """Drop the non-unique indexes on systems ahead of a cold bulk load.
+
+    Building an index once over the loaded table is far cheaper than
+    maintaining it row by row during the load. The id64 primary key stays,
+    ON CONFLICT needs it. The definitions are recorded in
+    seed_dropped_indexes in the same transaction as the drops, so an import
+    that dies mid-load leaves them for the next one to restore.
+
+    Returns:
+        Number of indexes dropped
+    """
     with conn.cursor() as cur:
+        cur.execute("""
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = 'systems'::regclass AND NOT x.indisunique
+        """)
+        indexes = cur.fetchall()
         cur.executemany(
-            """
+            "INSERT INTO seed_dropped_indexes (name, definition) VALUES (%s, %s)",
+            indexes,
+        )
+        for name, _ in indexes:
+            cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(name)))
+    conn.commit()
+    return len(indexes)
+
+
+def _restore_indexes(conn) -> int:
+    """Recreate the indexes recorded in seed_dropped_indexes.
+
+    Runs at the start of every import as well as after a cold load, so
+    indexes dropped by an import that never finished are rebuilt.
+
+    Returns:
+        Number of indexes rebuilt
+    """
+    with conn.cursor() as cur:
+        # Declared in init.sql; created here only for databases initialised
+        # before the table was added there
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS seed_dropped_indexes (
+                name TEXT PRIMARY KEY,
+                definition TEXT NOT NULL
+            )
+        """)
+        cur.execute("DELETE FROM seed_dropped_indexes RETURNING name, definition")
+        indexes = cur.fetchall()
+        for name, definition in indexes:
+            # Skip any that were recreated by hand in the meantime
+            cur.execute("SELECT to_regclass(%s) IS NULL", (name,))
+            if cur.fetchone()[0]:
+                cur.execute(definition)
+    conn.commit()
+    return len(indexes)
+
+
+def _insert_batch(conn, batch: list[tuple]) -> None:
+    """Insert a batch of systems into the database.
+
+    Rows are streamed into systems_stage with binary COPY (no per-row
+    statement parsing or round trips, and no server-side text-to-number
+    conversion), then merged into systems in one upsert. A system repeated
+    within the batch is merged once, from its last row, as row-by-row
+    inserts would leave it. The stage is emptied afterwards; committing is
+    left to the caller.
+    """
+    with conn.cursor() as cur:
+        with cur.copy(
+            "COPY systems_stage (id64, name, x, y, z, has_ring) FROM STDIN WITH (FORMAT BINARY)"
+        ) as copy:
+            copy.set_types(["int8", "text", "float8", "float8", "float8", "bool"])
+            for row in batch:
+                copy.write_row(row)
+
+        cur.execute("""
             INSERT INTO systems (id64, name, x, y, z, has_ring, spansh_updated_at)
-            VALUES (%(id64)s, %(name)s, %(x)s, %(y)s, %(z)s, %(has_ring)s, NOW())
+            SELECT DISTINCT ON (id64) id64, name, x, y, z, has_ring, NOW()
+            FROM systems_stage
+            ORDER BY id64, seq DESC
             ON CONFLICT (id64) DO UPDATE SET
                 name = EXCLUDED.name,
                 x = EXCLUDED.x,
@@ -68,9 +227,8 @@ def _insert_batch(conn, batch: list[dict]) -> None:
                 has_ring = EXCLUDED.has_ring,
                 spansh_updated_at = NOW(),
                 updated_at = NOW()
-            """,
-            batch,
-        )
+        """)
+        cur.execute("TRUNCATE systems_stage")
 
 
 def import_from_spansh() -> bool:
@@ -98,35 +256,73 @@ def import_from_spansh() -> bool:
 
     try:
         with psycopg.connect(DB_URL) as conn:
-            batch = []
+            # The import is an idempotent upsert: a crash just means running it
+            # again, so don't wait for the WAL flush on every commit
+            conn.execute("SET synchronous_commit = off")
+            _create_stage_table(conn)
             total = 0
+            uncommitted = 0
+
+            if _restore_indexes(conn):
+                console.print("[dim]Rebuilt indexes left dropped by an unfinished import[/dim]")
 
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(),
-                TaskProgressColumn(),
-                TextColumn("[dim]{task.completed:,} systems[/dim]"),
-                console=console,
-            ) as progress:
-                task = progress.add_task("Importing...", total=EXPECTED_SYSTEMS)
+            # Cold start: load without secondary indexes, rebuild them after.
+            # Checked here rather than with get_system_count(), which reads
+            # 0 on any error and would drop the indexes of a seeded database
+            with conn.cursor() as cur:
+                cur.execute("SELECT EXISTS (SELECT 1 FROM systems)")
+                cold_start = not cur.fetchone()[0]
+            conn.commit()
+            indexes_dropped = _drop_secondary_indexes(conn) if cold_start else 0
+            loaded = False
 
-                for system in _stream_systems(dump_file):
-                    batch.append(system)
+            # Parse on a background thread so gzip+ijson keep going while the
+            # database ingests the previous batch
+            batches: queue.Queue = queue.Queue(maxsize=BATCH_QUEUE_SIZE)
+            stop = threading.Event()
+            producer = threading.Thread(
+                target=_produce_batches, args=(dump_file, batches, stop), daemon=True
+            )
 
-                    if len(batch) >= BATCH_SIZE:
+            try:
+                producer.start()
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    BarColumn(),
+                    TaskProgressColumn(),
+                    TextColumn("[dim]{task.completed:,} systems[/dim]"),
+                    console=console,
+                ) as progress:
+                    task = progress.add_task("Importing...", total=EXPECTED_SYSTEMS)
+
+                    while (batch := batches.get()) is not None:
+                        if isinstance(batch, Exception):
+                            raise batch
                         _insert_batch(conn, batch)
-                        conn.commit()
                         total += len(batch)
+                        uncommitted += len(batch)
+                        if uncommitted >= COMMIT_ROWS:
+                            conn.commit()
+                            uncommitted = 0
                         progress.update(task, completed=total)
-                        batch = []
-
-                # Insert remaining
-                if batch:
-                    _insert_batch(conn, batch)
-                    conn.commit()
-                    total += len(batch)
-                    progress.update(task, completed=total)
+
+                conn.commit()
+                loaded = True
+            finally:
+                stop.set()
+                if indexes_dropped:
+                    # Also after a failed load, so a partial seed keeps its indexes
+                    try:
+                        conn.rollback()
+                        console.print("[dim]Rebuilding indexes...[/dim]")
+                        _restore_indexes(conn)
+                    except psycopg.Error as e:
+                        if loaded:
+                            raise
+                        # Don't mask the error that stopped the load; the
+                        # indexes stay recorded for the next import
+                        console.print(f"[yellow]Could not rebuild indexes:[/yellow] {e}")
 
         console.print()
         console.print(f"[green]Done![/green] Imported {total:,} systems.")
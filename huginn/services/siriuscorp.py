@@ -1,34 +1,41 @@
 """Siriuscorp scraper service - fetches RES data for candidate systems."""
 
-import time
-from datetime import timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
+import numpy as np
 import psycopg
 import requests
-from bs4 import BeautifulSoup
 from rich.console import Console
 
 from huginn.config import SIRIUSCORP_BOUNTY_QUERY_RADIUS_LY
 from huginn.services.utils import (
     DB_URL,
-    USER_AGENT,
+    QUERY_CONCURRENCY,
     QUERY_DELAY_SECONDS,
+    SESSION,
+    RateLimiter,
     clean_system_name,
     fetch_latest_tick,
+    greedy_cover,
+    parse_html,
 )
 
 SIRIUSCORP_URL = "https://siriuscorp.cc/bounty/"
 
+# RES updates are written in batches of this many candidates. Queries are
+# QUERY_DELAY_SECONDS apart, so an interrupted run loses at most a few minutes.
+RES_FLUSH_SIZE = 20
+
 console = Console()
 
 
 def _fetch_siriuscorp(system_name: str, radius_ly: float) -> str | None:
     """Fetch bounty hunting data from Siriuscorp for a reference system."""
     try:
-        response = requests.get(
+        response = SESSION.get(
             SIRIUSCORP_URL,
             params={"system": system_name, "radius": int(radius_ly)},
-            headers={"User-Agent": USER_AGENT},
             timeout=30,
         )
         response.raise_for_status()
@@ -38,35 +45,47 @@ def _fetch_siriuscorp(system_name: str, radius_ly: float) -> str | None:
         return None
 
 
-def _parse_siriuscorp_results(html: str) -> list[dict]:
+def _cell_has_text(cell) -> bool:
+    """Check whether a table cell shows any non-whitespace text."""
+    # Most cells hold a single text node (a tick mark or nothing); read it
+    # directly and only gather descendant text for cells with child elements
+    if len(cell):
+        return bool(cell.text_content().strip())
+    return bool(cell.text and cell.text.strip())
+
+
+def _parse_siriuscorp_results(html: str) -> dict[str, dict]:
     """Parse Siriuscorp bounty hunting results.
 
     Columns: System, Distance, CNB, Haz RES, High, Med, Low, Owner, Power, Updated
-    Returns list of dicts with: name, has_cnb, has_haz_res, has_high_res, has_med_res, has_low_res, updated_at.
+    Returns dict keyed by system name (first row wins) of dicts with: name, has_cnb,
+    has_haz_res, has_high_res, has_med_res, has_low_res, updated_at.
     """
-    from datetime import datetime, timezone
+    doc = parse_html(html)
+    if doc is None:
+        return {}
 
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table")
-    if not table:
-        return []
+    tables = doc.xpath("//table")
+    if not tables:
+        return {}
 
-    systems = []
-    rows = table.find_all("tr")
+    systems = {}
+    rows = list(tables[0].iter("tr"))
 
     for row in rows[1:]:
-        cells = row.find_all("td")
+        cells = row.findall("td")
         if len(cells) < 10:
             continue
 
-        raw_name = cells[0].get_text(strip=True)
+        # Strip and join text fragments, as BeautifulSoup's get_text(strip=True) did
+        raw_name = "".join(text.strip() for text in cells[0].itertext())
         name = clean_system_name(raw_name)
         # Columns: 0=System, 1=Distance, 2=CNB, 3=Haz RES, 4=High, 5=Med, 6=Low, 7=Owner, 8=Power, 9=Updated
-        has_cnb = bool(cells[2].get_text(strip=True))
-        has_haz = bool(cells[3].get_text(strip=True))
-        has_high = bool(cells[4].get_text(strip=True))
-        has_med = bool(cells[5].get_text(strip=True))
-        has_low = bool(cells[6].get_text(strip=True))
+        has_cnb = _cell_has_text(cells[2])
+        has_haz = _cell_has_text(cells[3])
+        has_high = _cell_has_text(cells[4])
+        has_med = _cell_has_text(cells[5])
+        has_low = _cell_has_text(cells[6])
 
         # Parse timestamp from title attribute (e.g., "2025-12-27T05:50:04+00:00")
         updated_at = None
@@ -78,8 +97,8 @@ def _parse_siriuscorp_results(html: str) -> list[dict]:
             except ValueError:
                 pass
 
-        if name:
-            systems.append({
+        if name and name not in systems:
+            systems[name] = {
                 "name": name,
                 "has_cnb": has_cnb,
                 "has_haz_res": has_haz,
@@ -87,11 +106,57 @@ def _parse_siriuscorp_results(html: str) -> list[dict]:
                 "has_med_res": has_med,
                 "has_low_res": has_low,
                 "updated_at": updated_at,
-            })
+            }
 
     return systems
 
 
+def _update_res_data(conn, pending: list[tuple]) -> None:
+    """Apply pending RES updates in a single statement.
+
+    Args:
+        conn: Database connection
+        pending: List of (name, has_cnb, has_haz_res, has_high_res, has_med_res,
+            has_low_res, updated_at) tuples. updated_at may be None, in which
+            case res_info_updated_at is set to NOW().
+    """
+    # RES flags only go from false to true: Siriuscorp not listing a RES
+    # doesn't prove it's absent
+    columns = [list(column) for column in zip(*pending)]
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE systems AS s
+            SET has_cnb = s.has_cnb OR v.has_cnb,
+                has_haz_res = s.has_haz_res OR v.has_haz_res,
+                has_high_res = s.has_high_res OR v.has_high_res,
+                has_med_res = s.has_med_res OR v.has_med_res,
+                has_low_res = s.has_low_res OR v.has_low_res,
+                res_info_updated_at = COALESCE(v.updated_at, NOW()),
+                updated_at = NOW()
+            FROM unnest(
+                %s::text[], %s::boolean[], %s::boolean[], %s::boolean[],
+                %s::boolean[], %s::boolean[], %s::timestamptz[]
+            ) AS v(name, has_cnb, has_haz_res, has_high_res, has_med_res, has_low_res, updated_at)
+            WHERE s.name = v.name
+            """,
+            columns,
+        )
+
+
+def _query_siriuscorp(system_name: str, limiter: RateLimiter) -> dict[str, dict] | None:
+    """Fetch and parse Siriuscorp results around a candidate, respecting the rate limit.
+
+    Returns:
+        Parsed results keyed by system name, or None if the fetch failed.
+    """
+    limiter.wait()
+    html = _fetch_siriuscorp(system_name, SIRIUSCORP_BOUNTY_QUERY_RADIUS_LY)
+    if not html:
+        return None
+    return _parse_siriuscorp_results(html)
+
+
 def update_res_from_siriuscorp() -> bool:
     """Query Siriuscorp for RES data on all Expansion candidates.
 
@@ -119,7 +184,7 @@ def update_res_from_siriuscorp() -> bool:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT name, has_cnb, has_haz_res, has_high_res, has_med_res, has_low_res,
-                           res_info_updated_at
+                           res_info_updated_at, x, y, z
                     FROM systems
                     WHERE power_state = 'Expansion' AND is_candidate = TRUE
                 """)
@@ -136,94 +201,115 @@ def update_res_from_siriuscorp() -> bool:
             siriuscorp_updates = 0
             skipped = 0
             queried = 0
-            for i, (cand_name, old_cnb, old_haz, old_high, old_med, old_low, res_updated_at) in enumerate(candidates):
-                # Check if RES info is already fresh (updated after last tick)
+            pending = []
+
+            # Check which candidates have stale RES info (not updated after last tick)
+            to_query = []
+            for cand_name, old_cnb, old_haz, old_high, old_med, old_low, res_updated_at, x, y, z in candidates:
                 if latest_tick and res_updated_at:
                     ts = res_updated_at.replace(tzinfo=timezone.utc) if res_updated_at.tzinfo is None else res_updated_at
                     if ts > latest_tick:
                         skipped += 1
                         continue
-
-                if queried > 0:
-                    time.sleep(QUERY_DELAY_SECONDS)
-                queried += 1
-
-                console.print(
-                    f"[cyan]({queried}/{len(candidates) - skipped})[/cyan] {cand_name}..."
-                )
-
-                html = _fetch_siriuscorp(cand_name, SIRIUSCORP_BOUNTY_QUERY_RADIUS_LY)
-                if not html:
-                    continue
-
-                systems = _parse_siriuscorp_results(html)
-
-                # Find our candidate in the results
-                cand_res = None
-                for sys in systems:
-                    if sys["name"] == cand_name:
-                        cand_res = sys
-                        break
-
-                if not cand_res:
-                    console.print(f"  [dim]Not found in response[/dim]")
-                    continue
-
-                # Check if Siriuscorp has new RES info
-                new_cnb = cand_res["has_cnb"] and not old_cnb
-                new_haz = cand_res["has_haz_res"] and not old_haz
-                new_high = cand_res["has_high_res"] and not old_high
-                new_med = cand_res["has_med_res"] and not old_med
-                new_low = cand_res["has_low_res"] and not old_low
-
-                if new_cnb or new_haz or new_high or new_med or new_low:
-                    set_parts = ["updated_at = NOW()"]
-                    params = []
-
-                    # Use timestamp from Siriuscorp if available
-                    if cand_res.get("updated_at"):
-                        set_parts.append("res_info_updated_at = %s")
-                        params.append(cand_res["updated_at"])
-                    else:
-                        set_parts.append("res_info_updated_at = NOW()")
-
-                    if cand_res["has_cnb"]:
-                        set_parts.append("has_cnb = TRUE")
-                    if cand_res["has_haz_res"]:
-                        set_parts.append("has_haz_res = TRUE")
-                    if cand_res["has_high_res"]:
-                        set_parts.append("has_high_res = TRUE")
-                    if cand_res["has_med_res"]:
-                        set_parts.append("has_med_res = TRUE")
-                    if cand_res["has_low_res"]:
-                        set_parts.append("has_low_res = TRUE")
-
-                    params.append(cand_name)
-                    with conn.cursor() as cur:
-                        cur.execute(
-                            f"""
-                            UPDATE systems
-                            SET {", ".join(set_parts)}
-                            WHERE name = %s
-                            """,
-                            params,
+                to_query.append((cand_name, old_cnb, old_haz, old_high, old_med, old_low, x, y, z))
+
+            # A response lists every system within the query radius, so one
+            # query can answer several nearby candidates: query only the
+            # centers of a greedy cover of the stale candidates
+            clusters = []
+            if to_query:
+                coords = np.array([cand[6:] for cand in to_query], dtype=np.float64)
+                clusters = greedy_cover(coords, SIRIUSCORP_BOUNTY_QUERY_RADIUS_LY)
+                if len(clusters) < len(to_query):
+                    console.print(
+                        f"[dim]{len(to_query)} stale candidates need {len(clusters)} queries[/dim]"
+                    )
+                    console.print()
+
+            # Queries overlap across QUERY_CONCURRENCY workers while the rate
+            # limiter keeps request starts QUERY_DELAY_SECONDS apart. map()
+            # yields in cluster order, so output and updates stay ordered.
+            limiter = RateLimiter()
+            executor = ThreadPoolExecutor(max_workers=QUERY_CONCURRENCY)
+            total_queries = len(clusters)
+            try:
+                while clusters:
+                    # Covered candidates the center's response didn't list,
+                    # to be queried on their own in the next round
+                    missed = []
+                    results = executor.map(
+                        lambda cluster: _query_siriuscorp(to_query[cluster[0]][0], limiter), clusters
+                    )
+                    for (center_idx, covered), systems in zip(clusters, results):
+                        queried += 1
+                        console.print(
+                            f"[cyan]({queried}/{total_queries})[/cyan] {to_query[center_idx][0]}..."
                         )
-                    conn.commit()
-
-                    # Show what RES info was added
-                    res_parts = []
-                    if new_cnb:
-                        res_parts.append("C")
-                    if new_haz:
-                        res_parts.append("H")
-                    if new_high:
-                        res_parts.append("H")
-                    if new_med:
-                        res_parts.append("M")
-                    if new_low:
-                        res_parts.append("L")
-                    console.print(f"  [green]+{''.join(res_parts)}[/green]")
-                    siriuscorp_updates += 1
+
+                        if systems is None:
+                            continue
+
+                        for idx in sorted(covered):
+                            cand_name, old_cnb, old_haz, old_high, old_med, old_low = to_query[idx][:6]
+                            label = f"{cand_name}: " if len(covered) > 1 else ""
+
+                            cand_res = systems.get(cand_name)
+                            if not cand_res:
+                                # Coverage is decided from our coordinates; the
+                                # server may cut the radius differently
+                                if idx != center_idx:
+                                    missed.append((idx, {idx}))
+                                    console.print(f"  [dim]{label}Not found in response, will query directly[/dim]")
+                                else:
+                                    console.print(f"  [dim]{label}Not found in response[/dim]")
+                                continue
+
+                            # Check if Siriuscorp has new RES info
+                            new_cnb = cand_res["has_cnb"] and not old_cnb
+                            new_haz = cand_res["has_haz_res"] and not old_haz
+                            new_high = cand_res["has_high_res"] and not old_high
+                            new_med = cand_res["has_med_res"] and not old_med
+                            new_low = cand_res["has_low_res"] and not old_low
+
+                            if new_cnb or new_haz or new_high or new_med or new_low:
+                                pending.append((
+                                    cand_name,
+                                    cand_res["has_cnb"],
+                                    cand_res["has_haz_res"],
+                                    cand_res["has_high_res"],
+                                    cand_res["has_med_res"],
+                                    cand_res["has_low_res"],
+                                    cand_res.get("updated_at"),
+                                ))
+                                if len(pending) >= RES_FLUSH_SIZE:
+                                    _update_res_data(conn, pending)
+                                    conn.commit()
+                                    pending = []
+
+                                # Show what RES info was added
+                                res_parts = []
+                                if new_cnb:
+                                    res_parts.append("C")
+                                if new_haz:
+                                    res_parts.append("H")
+                                if new_high:
+                                    res_parts.append("H")
+                                if new_med:
+                                    res_parts.append("M")
+                                if new_low:
+                                    res_parts.append("L")
+                                console.print(f"  {label}[green]+{''.join(res_parts)}[/green]")
+                                siriuscorp_updates += 1
+
+                    clusters = missed
+                    total_queries += len(missed)
+            finally:
+                # Don't sit through queued queries after an error or Ctrl-C
+                executor.shutdown(cancel_futures=True)
+
+            if pending:
+                _update_res_data(conn, pending)
+                conn.commit()
 
             console.print()
             if skipped > 0:
@@ -41,3 +41,10 @@ CREATE INDEX idx_systems_name ON systems(name);
 -- Filtered indexes for common queries
 CREATE INDEX idx_systems_interested ON systems(id64) WHERE is_interested;
 CREATE INDEX idx_systems_candidate ON systems(id64) WHERE is_candidate;
+
+-- Indexes the seeder dropped for a cold load and has yet to rebuild, kept
+-- here so an import that dies mid-load can be recovered by the next one
+CREATE TABLE seed_dropped_indexes (
+    name TEXT PRIMARY KEY,
+    definition TEXT NOT NULL
+);